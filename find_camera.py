@@ -1,13 +1,38 @@
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
 import cv2
 
+
+def _capture_backend() -> int:
+    """按平台显式选择采集后端，避免 OpenCV 逐个探测后端带来的延迟。"""
+    if sys.platform.startswith("linux"):
+        return cv2.CAP_V4L2
+    if sys.platform == "win32":
+        return cv2.CAP_DSHOW
+    if sys.platform == "darwin":
+        return cv2.CAP_AVFOUNDATION
+    return cv2.CAP_ANY
+
+
+def _probe(i):
+    """探测单个摄像头索引是否可用。"""
+    cap = cv2.VideoCapture(i, _capture_backend())
+    ok = cap.isOpened()
+    cap.release()
+    return i, ok
+
+
 def find_cameras(max_test_index=10):
-    for i in range(max_test_index):
-        cap = cv2.VideoCapture(i)
-        if cap.isOpened():
-            print(f"摄像头索引 {i} 可用")
-            cap.release()
-        else:
-            print(f"摄像头索引 {i} 不可用")
+    # 打开不可用索引会阻塞等待驱动超时，且 open 是 I/O 操作会释放 GIL，
+    # 用线程池并发探测所有索引，总耗时约为最慢一次探测而非逐个相加
+    with ThreadPoolExecutor(max_workers=max_test_index) as ex:
+        for i, ok in ex.map(_probe, range(max_test_index)):
+            if ok:
+                print(f"摄像头索引 {i} 可用")
+            else:
+                print(f"摄像头索引 {i} 不可用")
+
 
 if __name__ == "__main__":
-    find_cameras()
\ No newline at end of file
+    find_cameras()
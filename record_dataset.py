@@ -1,13 +1,20 @@
 #!/usr/bin/env python3
 import argparse
+import collections
+import functools
 import json
 import math
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import threading
 import time
 from pathlib import Path
 
 import cv2
 import numpy as np
-import pandas as pd
 import pyarrow as pa
 import pyarrow.parquet as pq
 
@@ -15,6 +22,17 @@ import pyarrow.parquet as pq
 # 摄像头相关辅助类           #
 #############################
 
+def _capture_backend() -> int:
+    """按平台显式选择采集后端，避免 OpenCV 逐个探测后端带来的隐藏延迟。"""
+    if sys.platform.startswith("linux"):
+        return cv2.CAP_V4L2
+    if sys.platform == "win32":
+        return cv2.CAP_DSHOW
+    if sys.platform == "darwin":
+        return cv2.CAP_AVFOUNDATION
+    return cv2.CAP_ANY
+
+
 class CameraReader:
     """摄像头读取基类，定义接口。"""
 
@@ -33,25 +51,47 @@ class CameraReader:
 class OpenCVCameraReader(CameraReader):
     """基于 OpenCV 的摄像头读取实现。"""
 
-    def __init__(self, cam_index: int, width: int = 640, height: int = 480):
+    def __init__(self, cam_index: int, width: int = 640, height: int = 480, fps: int = 30):
         self.index = cam_index
         self.width = width
         self.height = height
+        self.fps = fps
         self.cap: cv2.VideoCapture | None = None
+        # 默认解码缓冲：cap.read() 每次都新分配 ~W*H*3 字节，改为 retrieve
+        # 进这块预分配内存。注意返回的帧与该缓冲共享内存，下次 read 前需消费
+        self._buf = np.empty((height, width, 3), dtype=np.uint8)
 
     def open(self):
-        """打开摄像头并设置分辨率。"""
-        self.cap = cv2.VideoCapture(self.index)
+        """打开摄像头并设置分辨率、帧率与低延迟参数。"""
+        self.cap = cv2.VideoCapture(self.index, _capture_backend())
         if not self.cap.isOpened():
             raise RuntimeError(f"无法打开摄像头 {self.index}")
         self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
         self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
-
-    def read(self):
-        """读取一帧，如果摄像头未打开抛异常。"""
+        self.cap.set(cv2.CAP_PROP_FPS, self.fps)
+        # 驱动缓冲队列缩到 1 帧，read() 拿到的不再是积压的旧帧
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        # 请求 MJPG 压缩传输：未压缩的 YUY2 在 640×480@30 下每路约 18 MB/s，
+        # 两路以上就会占满 USB 2.0 带宽、压低可用帧率；MJPG 可降低 5–10 倍
+        self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*"MJPG"))
+        # 有些驱动会静默忽略 FOURCC 设置，回读确认压缩传输真的生效；
+        # 回读到 0 或负数说明后端不支持查询该属性，跳过而不是误报
+        fourcc = int(self.cap.get(cv2.CAP_PROP_FOURCC))
+        if fourcc > 0:
+            actual = "".join(chr((fourcc >> 8 * i) & 0xFF) for i in range(4)).strip("\x00 ")
+            if actual != "MJPG":
+                print(f"⚠️  摄像头 {self.index} 未接受 MJPG 传输（当前为 {actual or '未知'}），USB 带宽可能成为帧率瓶颈")
+        # 消耗启动初期的黑帧：不少摄像头前几帧自动曝光尚未收敛
+        for _ in range(5):
+            self.cap.read()
+
+    def read(self, dst: np.ndarray | None = None):
+        """读取一帧（grab/retrieve 分离），如果摄像头未打开抛异常。"""
         if self.cap is None:
             raise RuntimeError("摄像头未打开")
-        return self.cap.read()
+        if not self.cap.grab():
+            return False, None
+        return self.cap.retrieve(dst if dst is not None else self._buf)
 
     def release(self):
         """释放摄像头资源。"""
@@ -59,20 +99,293 @@ class OpenCVCameraReader(CameraReader):
             self.cap.release()
 
 
+class ThreadedCameraReader(OpenCVCameraReader):
+    """带后台采集线程的摄像头读取实现。
+
+    每个摄像头一个线程持续 grab()+retrieve() 把最新帧解码进双缓冲的
+    备用槽，换槽时才短暂加锁；read() 只在锁内做一次内存拷贝，永远不会
+    被阻塞式的 V4L/DirectShow I/O 卡住。多摄像头整体采集延迟约为
+    max(单摄像头) 而非各摄像头之和，且拿到的始终是最新一帧而不是
+    驱动缓冲区里的旧帧。
+    """
+
+    def open(self):
+        """打开摄像头并启动后台抓取线程。"""
+        super().open()
+        self._lock = threading.Lock()
+        # 双缓冲：后台线程解码进 _back，锁内只交换指针，不做 I/O
+        self._back = np.empty_like(self._buf)
+        self._latest = np.empty_like(self._buf)
+        self._ok = False
+        self._first_frame = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._grab_loop, daemon=True)
+        self._thread.start()
+
+    def _grab_loop(self):
+        """后台线程循环：持续抓取并解码最新帧，换入最新帧槽时才加锁。"""
+        while not self._stop.is_set():
+            ok = self.cap.grab()
+            frame = None
+            if ok:
+                ok, frame = self.cap.retrieve(self._back)
+            if not ok:
+                with self._lock:
+                    self._ok = False
+                # 抓取失败时稍作退避，摄像头掉线期间不让本线程空转占满一个核
+                time.sleep(0.005)
+                continue
+            with self._lock:
+                self._ok = True
+                self._back, self._latest = self._latest, frame
+            self._first_frame.set()
+
+    def read(self, dst: np.ndarray | None = None):
+        """把最近解码完成的一帧拷贝进 dst（默认内部缓冲）并返回。"""
+        if self.cap is None:
+            raise RuntimeError("摄像头未打开")
+        # 等待后台线程解码出第一帧，避免刚启动时读取失败
+        self._first_frame.wait(timeout=5.0)
+        with self._lock:
+            if not self._ok:
+                return False, None
+            if dst is None:
+                dst = self._buf
+            if dst.shape != self._latest.shape:
+                # 摄像头实际输出与请求的分辨率不一致，退化为新分配拷贝
+                return True, self._latest.copy()
+            np.copyto(dst, self._latest)
+        return True, dst
+
+    def release(self):
+        """停止后台线程并释放摄像头资源。"""
+        self._stop.set()
+        if getattr(self, "_thread", None) is not None:
+            self._thread.join(timeout=2.0)
+        super().release()
+
+
+#############################
+# 视频编码相关辅助类         #
+#############################
+
+@functools.lru_cache(maxsize=1)
+def _available_encoders() -> frozenset[str]:
+    """探测一次 ffmpeg 支持的编码器集合，结果缓存。ffmpeg 不可用时返回空集。"""
+    if shutil.which("ffmpeg") is None:
+        return frozenset()
+    try:
+        out = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-encoders"],
+            capture_output=True, text=True, timeout=10,
+        ).stdout
+    except (OSError, subprocess.TimeoutExpired):
+        return frozenset()
+    names = set()
+    for line in out.splitlines():
+        parts = line.split()
+        if len(parts) >= 2 and parts[0].startswith("V"):
+            names.add(parts[1])
+    return frozenset(names)
+
+
+@functools.lru_cache(maxsize=None)
+def _codec_works(codec: str) -> bool:
+    """用一帧测试编码验证编码器在本机真的能跑。
+
+    'ffmpeg -encoders' 只反映编译进了哪些编码器：发行版的 ffmpeg 通常
+    无条件列出 NVENC/QSV/VAAPI，在没有对应硬件的机器上要到运行时才报错。
+    """
+    cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error"]
+    if codec == "h264_vaapi":
+        cmd += ["-vaapi_device", "/dev/dri/renderD128"]
+    cmd += ["-f", "lavfi", "-i", "color=black:s=64x64:r=5", "-frames:v", "1"]
+    if codec == "h264_vaapi":
+        cmd += ["-vf", "format=nv12,hwupload"]
+    cmd += ["-c:v", codec, "-f", "null", "-"]
+    try:
+        return subprocess.run(cmd, capture_output=True, timeout=15).returncode == 0
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+
+
+@functools.lru_cache(maxsize=1)
+def _pick_video_codec() -> str | None:
+    """按平台优先级选择硬件编码器，都不可用时退回 libx264。"""
+    encoders = _available_encoders()
+    if not encoders:
+        return None  # 没有可用的 ffmpeg，调用方退回 cv2.VideoWriter
+    if sys.platform == "darwin":
+        preferred = ["hevc_videotoolbox", "h264_videotoolbox"]
+    else:
+        preferred = ["h264_nvenc", "hevc_nvenc", "h264_qsv", "h264_vaapi"]
+    for codec in preferred:
+        if codec in encoders and _codec_works(codec):
+            return codec
+    # 无专利编译的 ffmpeg 可能没有 libx264，此时退回 cv2 的 mp4v 路径
+    return "libx264" if "libx264" in encoders else None
+
+
+class FFmpegVideoWriter:
+    """基于 ffmpeg 子进程管道的视频写入器，接口与 cv2.VideoWriter 兼容。
+
+    优先使用硬件编码器（NVENC / VideoToolbox / QSV / VAAPI），
+    大幅降低编码的 CPU 占用，为采集留出算力；都不可用时退回
+    libx264 的 ultrafast 预设。帧以 bgr24 裸数据写入子进程 stdin。
+    """
+
+    def __init__(self, path: Path, fps: int, frame_shape: tuple[int, int, int], codec: str,
+                 crf: int = 23, preset: str | None = None):
+        height, width, _ = frame_shape
+        cmd = [
+            "ffmpeg", "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "bgr24",
+            "-s", f"{width}x{height}", "-r", str(fps),
+            "-i", "-",
+        ]
+        if codec == "h264_vaapi":
+            # VAAPI 需要先把帧上传到显存
+            cmd += ["-vaapi_device", "/dev/dri/renderD128", "-vf", "format=nv12,hwupload"]
+        cmd += ["-c:v", codec]
+        # 每秒一个关键帧且不用 B 帧：编码更省 CPU，下游 loader 随机 seek 也更快
+        cmd += ["-g", str(fps), "-bf", "0"]
+        if codec in ("h264_nvenc", "hevc_nvenc"):
+            cmd += ["-preset", preset or "p4", "-rc", "vbr", "-cq", str(crf)]
+        elif codec in ("hevc_videotoolbox", "h264_videotoolbox"):
+            cmd += ["-b:v", "8M"]
+            if codec == "hevc_videotoolbox":
+                cmd += ["-tag:v", "hvc1"]  # QuickTime 兼容
+        elif codec in ("h264_qsv", "h264_vaapi"):
+            cmd += ["-b:v", "8M"]
+        else:  # libx264 软件兜底
+            cmd += ["-tune", "zerolatency", "-preset", preset or "veryfast",
+                    "-crf", str(crf), "-pix_fmt", "yuv420p"]
+        cmd += ["-movflags", "+faststart", os.fspath(path)]
+        self.path = path
+        self.proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, bufsize=0)
+
+    def write(self, frame):
+        """写入一帧 BGR 图像（裸数据，无拷贝）。"""
+        self.proc.stdin.write(frame.data)
+
+    def release(self):
+        """关闭管道并等待 ffmpeg 完成封装，异常退出时告警。"""
+        self.proc.stdin.close()
+        rc = self.proc.wait()
+        if rc != 0:
+            print(f"⚠️  ffmpeg 编码异常退出（返回码 {rc}），视频文件可能不完整: {self.path}")
+
+
+class FrameEncoderPipeline:
+    """单生产者/单消费者的帧编码流水线（每个摄像头一条）。
+
+    预分配固定数量的 BGR 缓冲槽：采集侧 acquire() 取空闲槽、填入帧后
+    submit() 入队，编码线程出队调用 writer.write() 后把槽归还空闲池。
+    磁盘编码与下一帧采集重叠，且稳态下不再有逐帧内存分配。
+    """
+
+    NUM_SLOTS = 8  # 每个摄像头预分配的缓冲槽数量
+
+    def __init__(self, frame_shape: tuple[int, int, int]):
+        # 缓冲槽只在这里分配一次，跨 episode 复用
+        self.slots = [np.empty(frame_shape, dtype=np.uint8) for _ in range(self.NUM_SLOTS)]
+        self._free = collections.deque(range(self.NUM_SLOTS))
+        self._pending: queue.SimpleQueue = queue.SimpleQueue()
+        self._writer = None
+        self._thread = None
+        self._error: Exception | None = None
+        self.running = False
+
+    def start(self, writer):
+        """开始一个 episode：绑定新的视频写入器并启动编码线程。"""
+        self._free = collections.deque(range(self.NUM_SLOTS))
+        self._writer = writer
+        self._error = None
+        self._thread = threading.Thread(target=self._encode_loop, daemon=True)
+        self._thread.start()
+        self.running = True
+
+    def acquire(self):
+        """取一个空闲缓冲槽，返回 (槽索引, 缓冲数组)；池空时等待编码线程归还。
+
+        编码线程异常退出时快速失败并重抛其异常，不会因为槽位永远
+        等不到归还而静默挂死采集线程。
+        """
+        while True:
+            if self._error is not None:
+                raise RuntimeError("编码线程异常退出") from self._error
+            try:
+                idx = self._free.popleft()
+                return idx, self.slots[idx]
+            except IndexError:
+                if not self._thread.is_alive():
+                    raise RuntimeError("编码线程已退出，缓冲槽不会再归还") from self._error
+                time.sleep(0.001)  # 编码落后于采集，稍等槽位归还
+
+    def release(self, idx: int):
+        """归还一个未提交的缓冲槽（例如该帧读取失败时）。"""
+        self._free.append(idx)
+
+    def submit(self, idx: int):
+        """把填好帧的缓冲槽提交给编码线程。"""
+        self._pending.put(idx)
+
+    def _encode_loop(self):
+        """编码线程循环：出队写入视频，然后归还缓冲槽。
+
+        写入异常记录到 self._error，由采集线程在 acquire()/finish() 重抛。
+        """
+        try:
+            while True:
+                idx = self._pending.get()
+                if idx is None:  # 结束哨兵
+                    break
+                self._writer.write(self.slots[idx])
+                self._free.append(idx)
+        except Exception as e:
+            self._error = e
+
+    def finish(self):
+        """结束当前 episode：等待所有待编码帧写完，并释放视频写入器。"""
+        self._pending.put(None)
+        self._thread.join()
+        err, self._error = self._error, None
+        try:
+            self._writer.release()
+        except Exception:
+            if err is None:
+                raise
+        finally:
+            self._writer = None
+            self.running = False
+        if err is not None:
+            raise RuntimeError("编码线程异常退出，视频可能不完整") from err
+
+
 #############################
 # 数据集相关辅助函数         #
 #############################
 
+# 所有 episode 共用的 parquet 表结构，构造一次让 Arrow 跳过逐次的类型推断
+EP_SCHEMA = pa.schema([
+    ("timestamp", pa.float64()),
+    ("frame", pa.int64()),
+])
+
 def _make_episode_name(ep_idx: int) -> str:
     """格式化生成单个 episode 的名称，格式为 episode_000000。"""
     return f"episode_{ep_idx:06d}"
 
 
-def _init_video_writer(path: Path, fps: int, frame_shape: tuple[int, int, int]):
-    """初始化一个视频写入器，编码格式为 mp4v。"""
+def _init_video_writer(path: Path, fps: int, frame_shape: tuple[int, int, int],
+                       crf: int = 23, preset: str | None = None):
+    """初始化一个视频写入器，优先 ffmpeg 硬件编码，无 ffmpeg 时退回 mp4v。"""
+    codec = _pick_video_codec()
+    if codec is not None:
+        return FFmpegVideoWriter(path, fps, frame_shape, codec, crf, preset)
     fourcc = cv2.VideoWriter_fourcc(*"mp4v")
     height, width, _ = frame_shape
-    return cv2.VideoWriter(str(path), fourcc, fps, (width, height))
+    return cv2.VideoWriter(os.fspath(path), fourcc, fps, (width, height))
 
 
 def _write_info_json(meta_dir: Path, fps: int):
@@ -85,145 +398,282 @@ def _write_info_json(meta_dir: Path, fps: int):
         json.dump(info, f, indent=2)
 
 
-def _append_jsonl(path: Path, data: dict):
-    """向 jsonl 文件追加一行 JSON。"""
-    with path.open("a") as f:
-        json.dump(data, f)
-        f.write("\n")
-
-
-def record_dataset(args):
-    """主录制函数，根据传入参数录制数据集。"""
+def _append_jsonl(fp, data: dict):
+    """向已打开的 jsonl 文件句柄追加一行紧凑 JSON（单次 write 含换行）。"""
+    fp.write(json.dumps(data, separators=(",", ":")) + "\n")
+
+
+class CameraRecorder:
+    """长生命周期的多摄像头录制器，支持上下文管理协议。
+
+    摄像头打开（含 500ms–2s 的自动曝光收敛）、编码流水线和后台元数据
+    写线程都在 open()/__enter__ 里初始化一次，record_episode() 可被
+    反复调用，把这些一次性成本摊薄到所有 episode 上；也便于外部编排器
+    以常驻进程方式按需录制。close()/__exit__ 统一释放所有资源。
+    """
+
+    def __init__(self, args):
+        self.args = args
+
+        # 解析摄像头参数
+        cam_specs: dict[str, int] = {}
+        if args.camera is None:
+            cam_specs = {"front": 0}
+        else:
+            for spec in args.camera:
+                if "=" not in spec:
+                    raise ValueError(f"--camera 参数格式应为 name=index, 收到: {spec}")
+                name, idx = spec.split("=", 1)
+                cam_specs[name] = int(idx)
+        if len(cam_specs) == 0:
+            raise ValueError("至少需要定义一个摄像头")
+        self.cam_specs = cam_specs
+
+        # 定义输出目录结构
+        out_dir = Path(args.out_dir)
+        self.meta_dir = out_dir / "meta"
+        self.data_dir = out_dir / "data" / "chunk-000"
+        video_dir_root = out_dir / "videos" / "chunk-000"
+
+        # 每个摄像头的视频目录前缀只构造一次，episode 内不再重复拼接 Path
+        self.video_paths = {name: video_dir_root / f"observation.images.{name}" for name in cam_specs.keys()}
+
+        # 创建所有需要的目录，存在则跳过
+        for d in [self.meta_dir, self.data_dir, *self.video_paths.values()]:
+            d.mkdir(parents=True, exist_ok=True)
+
+        # 只写入一次 info.json
+        _write_info_json(self.meta_dir, args.fps)
+
+        # 如果 tasks.jsonl 不存在，写入默认任务（单任务）
+        if not (self.meta_dir / "tasks.jsonl").exists():
+            with (self.meta_dir / "tasks.jsonl").open("a") as f:
+                _append_jsonl(f, {"task_index": 0, "task": args.task})
+
+        # 预分配帧元数据数组（SoA），所有 episode 复用，按 frame_count 切片；
+        # 避免逐帧构造 Python dict 和 list 扩容拷贝
+        self.max_frames = math.ceil(args.duration * args.fps)
+        self._ts_arr = np.empty(self.max_frames, dtype=np.float64)
+        self._idx_arr = np.arange(self.max_frames, dtype=np.int64)
+
+        # 热循环按索引对齐的列表工作，避免逐帧的 dict 视图迭代和 dict 查找
+        self.cam_names = list(cam_specs.keys())
+        self._readers: list[ThreadedCameraReader] = []
+        # 每个摄像头一条编码流水线（与 cam_names 对齐），跨 episode 复用缓冲槽；
+        # 首帧成功读取后才按实际帧尺寸创建
+        self._pipelines: list[FrameEncoderPipeline | None] = [None] * len(self.cam_names)
+
+        self._eps_fp = None
+        self._stats_fp = None
+        self._meta_queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._meta_thread: threading.Thread | None = None
+        self._meta_error: Exception | None = None
+        self._last_read_warn = 0.0  # 读取失败告警的限流时间戳
 
-    # 解析摄像头参数
-    cam_specs: dict[str, int] = {}
-    if args.camera is None:
-        cam_specs = {"front": 0}
-    else:
-        for spec in args.camera:
-            if "=" not in spec:
-                raise ValueError(f"--camera 参数格式应为 name=index, 收到: {spec}")
-            name, idx = spec.split("=", 1)
-            cam_specs[name] = int(idx)
-    if len(cam_specs) == 0:
-        raise ValueError("至少需要定义一个摄像头")
-
-    # 定义输出目录结构
-    out_dir = Path(args.out_dir)
-    meta_dir = out_dir / "meta"
-    data_dir = out_dir / "data" / "chunk-000"
-    video_dir_root = out_dir / "videos" / "chunk-000"
-
-    # 创建所有需要的目录，存在则跳过
-    video_dirs = [video_dir_root / f"observation.images.{name}" for name in cam_specs.keys()]
-    for d in [meta_dir, data_dir, *video_dirs]:
-        d.mkdir(parents=True, exist_ok=True)
-
-    # 只写入一次 info.json
-    _write_info_json(meta_dir, args.fps)
-
-    # 如果 tasks.jsonl 不存在，写入默认任务（单任务）
-    if not (meta_dir / "tasks.jsonl").exists():
-        _append_jsonl(meta_dir / "tasks.jsonl", {"task_index": 0, "task": args.task})
-
-    if len(cam_specs) == 0:
-        raise ValueError("至少需要定义一个摄像头")
-
-    # 创建并打开摄像头
-    cam_readers: dict[str, OpenCVCameraReader] = {}
-    for name, idx in cam_specs.items():
-        reader = OpenCVCameraReader(idx, args.width, args.height)
-        reader.open()
-        cam_readers[name] = reader
-
-    try:
-        for ep in range(args.episodes):
-            ep_name = _make_episode_name(ep)
-            print(f"开始录制 {ep_name} …")
-            rows = []  # 用于存储当前 episode 的帧元数据
-
-            # 视频写入器，延迟初始化直到第一帧成功读取
-            vw_writers = {name: None for name in cam_specs.keys()}
-
-            start_t = time.time()
-            frame_count = 0
-            max_frames = math.ceil(args.duration * args.fps)
-            while frame_count < max_frames:
-                loop_start = time.time()
-
-                # 从所有摄像头读取帧
-                frames = []
-                success = True
-                for name, reader in cam_readers.items():
+    def open(self):
+        """打开摄像头、元数据文件句柄并启动后台写线程。"""
+        # 创建并打开摄像头（每个摄像头一个后台采集线程）
+        for idx in self.cam_specs.values():
+            reader = ThreadedCameraReader(idx, self.args.width, self.args.height, self.args.fps)
+            reader.open()
+            self._readers.append(reader)
+
+        # episode 元数据文件句柄只打开一次（行缓冲），避免每个 episode 一对 open/close 系统调用
+        self._eps_fp = (self.meta_dir / "episodes.jsonl").open("a", buffering=1)
+        self._stats_fp = (self.meta_dir / "episodes_stats.jsonl").open("a", buffering=1)
+
+        # episode 元数据（parquet + jsonl）由后台线程落盘，主线程不等磁盘 I/O
+        # 就能开始下一个 episode 的采集；各 episode 数据互不相交，无需加锁
+        self._meta_thread = threading.Thread(target=self._meta_writer_loop, daemon=True)
+        self._meta_thread.start()
+        return self
+
+    def _meta_writer_loop(self):
+        """后台线程循环：执行各 episode 的 parquet 与 jsonl 写入。
+
+        单个 episode 写入失败（磁盘满、权限等）只告警并记录异常，
+        线程继续消费队列，首个异常由 close() 重抛。
+        """
+        while True:
+            item = self._meta_queue.get()
+            if item is None:  # 结束哨兵
+                break
+            ep, ep_name, ts_copy, n = item
+            try:
+                table = pa.table({
+                    "timestamp": pa.array(ts_copy),
+                    "frame": pa.array(self._idx_arr[:n]),
+                }, schema=EP_SCHEMA)
+                # 显式调参：ZSTD 对近似线性的两列压缩率远好于默认 Snappy，
+                # frame 列是单调递增的 int64，delta 编码后每个值只需约 2 字节；
+                # 单个 row group 摊薄小文件的 footer 开销
+                pq.write_table(
+                    table,
+                    self.data_dir / f"{ep_name}.parquet",
+                    compression="zstd",
+                    compression_level=3,
+                    use_dictionary=False,
+                    write_statistics=False,
+                    row_group_size=len(table),
+                    column_encoding={"frame": "DELTA_BINARY_PACKED"},
+                )
+                # 追加当前 episode 的元数据与简单统计信息
+                _append_jsonl(self._eps_fp, {
+                    "episode_index": ep,
+                    "episode_length": n,
+                    "tasks": [0],  # 关联任务索引
+                })
+                _append_jsonl(self._stats_fp, {
+                    "episode_index": ep,
+                    "stats": {"length": n},
+                })
+            except Exception as e:
+                print(f"⚠️  {ep_name} 元数据写入失败: {e}")
+                if self._meta_error is None:
+                    self._meta_error = e
+
+    def record_episode(self, ep: int) -> int:
+        """录制一个 episode，返回实际录制的帧数。"""
+        args = self.args
+        ep_name = _make_episode_name(ep)
+        print(f"开始录制 {ep_name} …")
+
+        # 热循环里反复用到的对象提前绑定到局部变量
+        reader_list = self._readers
+        pipeline_list = self._pipelines
+        ts_arr = self._ts_arr
+
+        # 使用单调时钟做绝对时间表调度：每帧的截止时刻都相对 epoch 计算，
+        # 误差不随帧数累积，也不受系统时间（NTP）跳变影响
+        epoch = time.monotonic()
+        frame_count = 0
+        while frame_count < self.max_frames:
+            # 从所有摄像头读取帧，稳态下直接解码进流水线的空闲缓冲槽
+            frames = []
+            slot_ids = []  # 与 frames 对齐的缓冲槽索引，流水线未初始化时为 None
+            success = True
+            for i, reader in enumerate(reader_list):
+                pl = pipeline_list[i]
+                if pl is None or not pl.running:
+                    slot = None
                     ok, frame = reader.read()
+                else:
+                    slot, buf = pl.acquire()
+                    ok, frame = reader.read(buf)
                     if not ok:
-                        print(f"⚠️  摄像头 {name} 读取帧失败")
-                        success = False
-                        break
-                    frames.append(frame)
-                
-                if not success:
-                    continue
-
-                # 初始化视频写入器（第一次成功读取帧时）
-                if any(vw is None for vw in vw_writers.values()):
-                    for cam_name, frame in zip(cam_specs.keys(), frames):
-                        vw_writers[cam_name] = _init_video_writer(
-                            (video_dir_root / f"observation.images.{cam_name}" / f"{ep_name}.mp4"),
-                            args.fps,
-                            frame.shape,
-                        )
-
-                # 写入视频帧
-                for cam_name, frame in zip(cam_specs.keys(), frames):
-                    vw_writers[cam_name].write(frame)
-
-                # 记录当前帧时间戳和帧序号
-                timestamp = time.time() - start_t
-                rows.append({
-                    "timestamp": timestamp,
-                    "frame": frame_count,  # 对应视频中的帧索引
-                })
-
-                frame_count += 1
-
-                # 检查是否达到最小帧数要求
-                if frame_count >= args.min_frames:
-                    print(f"已达到最小帧数要求 ({frame_count}/{args.min_frames})，结束当前 episode")
+                        pl.release(slot)
+                if not ok:
+                    # 告警限流：摄像头掉线期间每秒最多打印一次，不刷屏
+                    now = time.monotonic()
+                    if now - self._last_read_warn >= 1.0:
+                        print(f"⚠️  摄像头 {self.cam_names[i]} 读取帧失败")
+                        self._last_read_warn = now
+                    success = False
                     break
-
-                # 控制帧率，忙等待直到下一个采样时间
-                dt = 1 / args.fps - (time.time() - loop_start)
-                if dt > 0:
-                    time.sleep(dt)
-
-            # 释放视频写入器
-            for vw in vw_writers.values():
-                vw.release()
-
-            # 将元数据保存为 parquet 文件
-            table = pa.Table.from_pandas(pd.DataFrame(rows))
-            pq.write_table(table, data_dir / f"{ep_name}.parquet")
-
-            # 追加当前 episode 的元数据到 episodes.jsonl
-            _append_jsonl(meta_dir / "episodes.jsonl", {
-                "episode_index": ep,
-                "episode_length": frame_count,
-                "tasks": [0],  # 关联任务索引
-            })
-
-            # 追加简单统计信息到 episodes_stats.jsonl（这里仅记录长度）
-            _append_jsonl(meta_dir / "episodes_stats.jsonl", {
-                "episode_index": ep,
-                "stats": {"length": frame_count},
-            })
-
-            print(f"完成 {ep_name}，共录制 {frame_count} 帧")
-
-    finally:
-        # 确保摄像头资源释放
-        for r in cam_readers.values():
+                frames.append(frame)
+                slot_ids.append(slot)
+
+            if not success:
+                # 归还本轮已占用但不会提交的缓冲槽
+                for pl, slot in zip(pipeline_list, slot_ids):
+                    if slot is not None:
+                        pl.release(slot)
+                # 退避一个帧间隔再重试：read() 失败是立即返回的，
+                # 不退避的话掉线期间这个循环会以 CPU 速度空转
+                time.sleep(1 / args.fps)
+                continue
+
+            # 在编码之前记下采集时刻，时间戳反映的是采集瞬间而非编码完成后
+            capture_t = time.monotonic()
+
+            # 启动编码流水线（每个 episode 的第一帧）：流水线与缓冲槽跨
+            # episode 复用，只有视频写入器按 episode 新建；首帧拷入缓冲槽
+            if any(pl is None or not pl.running for pl in pipeline_list):
+                for i, frame in enumerate(frames):
+                    pl = pipeline_list[i]
+                    if pl is None:
+                        pl = FrameEncoderPipeline(frame.shape)
+                        pipeline_list[i] = pl
+                    writer = _init_video_writer(
+                        self.video_paths[self.cam_names[i]] / f"{ep_name}.mp4",
+                        args.fps,
+                        frame.shape,
+                        args.video_crf,
+                        args.video_preset,
+                    )
+                    pl.start(writer)
+                    slot, buf = pl.acquire()
+                    np.copyto(buf, frame)
+                    slot_ids[i] = slot
+
+            # 把帧提交给各自的编码线程，编码与下一帧采集重叠
+            for pl, slot in zip(pipeline_list, slot_ids):
+                pl.submit(slot)
+
+            # 记录当前帧时间戳（帧序号即 idx_arr 中的下标）
+            ts_arr[frame_count] = capture_t - epoch
+
+            frame_count += 1
+
+            # 控制帧率：睡到本帧的绝对截止时刻，误差为 O(1) 而非逐帧累积；
+            # 最后 200 微秒改为自旋，获得亚毫秒级精度
+            deadline = epoch + frame_count / args.fps
+            sleep = deadline - time.monotonic() - 2e-4
+            if sleep > 0:
+                time.sleep(sleep)
+            while time.monotonic() < deadline:
+                pass
+
+        # 等待各编码线程清空队列并释放视频写入器（缓冲槽保留给下个 episode）
+        for pl in pipeline_list:
+            if pl is not None and pl.running:
+                pl.finish()
+
+        # 最小帧数只在 episode 结束后检查一次，不在热循环里逐帧判断
+        if frame_count < args.min_frames:
+            print(f"⚠️  episode 帧数不足最小要求: {frame_count}/{args.min_frames}")
+
+        # 元数据交给后台写线程；ts_arr 跨 episode 复用，入队前拷贝切片
+        self._meta_queue.put((ep, ep_name, ts_arr[:frame_count].copy(), frame_count))
+
+        print(f"完成 {ep_name}，共录制 {frame_count} 帧")
+        return frame_count
+
+    def close(self):
+        """释放摄像头；等后台写线程清空队列后再关闭元数据文件句柄。
+
+        后台写入曾经失败时在这里重抛首个异常，调用方不会误以为
+        所有 episode 的元数据都已落盘。
+        """
+        for r in self._readers:
             r.release()
+        self._readers.clear()
+        if self._meta_thread is not None:
+            self._meta_queue.put(None)
+            self._meta_thread.join()
+            self._meta_thread = None
+        if self._eps_fp is not None:
+            self._eps_fp.close()
+            self._eps_fp = None
+        if self._stats_fp is not None:
+            self._stats_fp.close()
+            self._stats_fp = None
+        if self._meta_error is not None:
+            err, self._meta_error = self._meta_error, None
+            raise RuntimeError("部分 episode 元数据写入失败") from err
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def record_dataset(args):
+    """主录制函数，根据传入参数录制数据集。"""
+    with CameraRecorder(args) as recorder:
+        for ep in range(args.episodes):
+            recorder.record_episode(ep)
 
 
 def parse_args():
@@ -238,7 +688,12 @@ def parse_args():
     p.add_argument("--width", type=int, default=640, help="视频宽度")
     p.add_argument("--height", type=int, default=480, help="视频高度")
     p.add_argument("--task", type=str, default="Custom task", help="任务的自然语言描述")
-    return p.parse_args()
+    p.add_argument("--video_crf", type=int, default=23, help="视频编码质量（libx264 的 -crf / NVENC 的 -cq），越小质量越高")
+    p.add_argument("--video_preset", type=str, default=None, help="视频编码预设，默认 libx264 用 veryfast、NVENC 用 p4")
+    args = p.parse_args()
+    if args.min_frames > args.fps * args.duration:
+        p.error(f"--min_frames ({args.min_frames}) 不能超过 fps × duration ({args.fps * args.duration:g})")
+    return args
 
 
 if __name__ == "__main__":